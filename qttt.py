@@ -12,82 +12,184 @@ __version__ = "1.240402"
 __author__ = "M. F. Hasler"
 __copyright__ = "Copyright 2024 by M. F. Hasler"
 
-class Move(dict):
-    """A dict whose entry 'squares' gives a 2-tuple (square1, square2) with the
-    two squares (e.g., "a1","b2") on which the quantum piece is to be placed
-    on the board. 
-    Upon initialisation (see Move.__init__ for signature), it MAY have entries:
-    'squares' (str, str): 2-tuple of the squares on which the Piece is placed
-    'board' (Board): the board on which this move is considered
-            (allows to check for legal coordinates and "entanglement")
-    'pending' (bool): move requires a decision to be made by the next player
+import re
+import string
+from array import array
+from collections import deque
+from dataclasses import dataclass, InitVar
+from functools import lru_cache
+
+_SQUARE_RE = re.compile(r'[a-z][1-9]\d?$') # 'a1' ... 'z99'
+_MOVE_RE = re.compile(r'([a-z][1-9]\d?)[^a-z0-9]*([a-z][1-9]\d?)$', re.I)
+
+# The board geometry only depends on the size, so it is computed once per
+# size and shared by all Board instances (Board has __slots__, which rules
+# out functools.cached_property; lru_cache on free functions deduplicates
+# across boards as well, e.g. for the many short-lived boards of a search).
+@lru_cache(maxsize=None)
+def _cols(size):
+    """String 'abc...' of the letters allowed as column specifier."""
+    return string.ascii_lowercase[:size]
+
+@lru_cache(maxsize=None)
+def _rows(size):
+    """Tuple ('1','2','3',...) of valid row specifiers (may exceed '9'!)."""
+    return tuple(map(str, range(1, size+1)))
+
+@lru_cache(maxsize=None)
+def _squares(size):
+    """Tuple of all squares 'a1', ..., in order from top left to bottom right,
+    i.e., a3, b3, c3; a2, b2, c2; a1, b1, c1 (or similar for larger boards)."""
+    return tuple(col+row for row in _rows(size)[::-1] for col in _cols(size))
+
+@lru_cache(maxsize=None)
+def _groups(size):
+    """Tuple of tuples of the squares forming the diagonals & horizontal
+    & vertical rows."""
+    cols, rows = _cols(size), _rows(size)
+    return (tuple(c+r for c,r in zip(cols,rows)),       # main diagonal
+            tuple(c+r for c,r in zip(cols,rows[::-1])), # antidiagonal
+            *(tuple(c+r for r in rows) for c in cols),  # vertical files
+            *(tuple(c+r for c in cols) for r in rows))  # horizontal ranks
+
+@lru_cache(maxsize=None)
+def _group_index(size):
+    """Flat square indices (into _squares(size)) of all groups, concatenated;
+    the integer form of _groups used by the scoring kernel."""
+    pos = {s: i for i, s in enumerate(_squares(size))}
+    return array('i', (pos[s] for g in _groups(size) for s in g))
+
+_line_tables = {}
+def _line_table(size):
+    """Table mapping a packed line (2 bits per square: 0 = empty, 1 or 2 =
+    classical piece of the 1st or 2nd player, 3 = quantum) to the winning
+    player (1 or 2), or 0 if the line is not won. Built once per size."""
+    try: return _line_tables[size]
+    except KeyError: pass
+    table = [0] * 4**size
+    ones = int('01' * size, 2) # line filled with classical pieces of player 1
+    table[ones] = 1 ; table[2*ones] = 2
+    _line_tables[size] = table
+    return table
+
+@lru_cache(maxsize=None)
+def _unrolled_scorer(size, symbols):
+    """Generate a compute_score specialized for a fixed board size, unrolling
+    the winning lines into straight-line comparisons on the _owner dict with
+    the square names and symbols baked in as constants.  Only done for the
+    small sizes that dominate real play; returns None for larger boards
+    (which keep the generic loop).  The function is shared per (size,
+    symbols) and bound to each board at construction time."""
+    if size > 5: return None
+    src = ["def _score(self):",
+           "    if self._pending: return None",
+           "    o = self._owner.get ; w1 = 0 ; w2 = 0"]
+    for group in _groups(size):
+        chain = " == ".join(f"o({s!r})" for s in group[1:])
+        src += [f"    v = o({group[0]!r})",
+                f"    if v is not None and v == {chain}:",
+                f"        if v == {symbols[0]!r}: w1 += 1",
+                f"        else: w2 += 1"]
+    src += ["    if w1: return 0 if w2 else w1", # both players winning => draw
+            "    if w2: return -w2",
+            f"    return 0 if len(self._owner) == {size*size} else None"]
+    namespace = {}
+    exec("\n".join(src), namespace)
+    return namespace['_score']
+
+def _score_groups(codes, group_idx, size):
+    """Count the completed lines of each player.  'codes' holds the 2-bit
+    encoding of every square (see Board._square_code), 'group_idx' the
+    concatenated square indices of all groups, 'size' their length.
+    Kept free of Python objects so numba can JIT-compile it when installed."""
+    w1 = w2 = 0
+    for g in range(0, len(group_idx), size):
+        c = codes[group_idx[g]]
+        if c == 1 or c == 2:
+            won = True
+            for i in range(g+1, g+size):
+                if codes[group_idx[i]] != c:
+                    won = False ; break
+            if won:
+                if c == 1: w1 += 1
+                else: w2 += 1
+    return w1, w2
+
+def score_batch(owner_codes, size=3):
+    """Evaluate many positions at once (for minimax-style rollouts [see the
+    README to-do list]).  'owner_codes' is an integer array-like of shape
+    (B, size*size): 0 = no classical piece on that square, 1 or 2 = classical
+    piece of the 1st or 2nd player, in the order of Board.squares (see
+    Board.owner_codes).  Returns an int array of length B following the
+    Board.score convention for completed lines: +lines for the 1st player,
+    -lines for the 2nd, 0 if both (or neither) have one — callers must tell
+    full-board draws from unfinished games themselves, e.g. via
+    (owner_codes != 0).all(axis=1).  Requires numpy (an optional extra);
+    one vectorized pass replaces B Python-level scoring calls."""
+    import numpy as np # deliberately imported here only
+    codes = np.asarray(owner_codes, dtype=np.int8)
+    gi = np.frombuffer(_group_index(size), dtype=np.intc).reshape(-1, size)
+    lines = codes[:, gi]                    # -> shape (B, #groups, size)
+    won = (lines == lines[:, :, :1]).all(axis=2) & (lines[:, :, 0] != 0)
+    w1 = (won & (lines[:, :, 0] == 1)).sum(axis=1)
+    w2 = (won & (lines[:, :, 0] == 2)).sum(axis=1)
+    return np.where(w1 * w2 > 0, 0, w1 - w2) # both players winning => draw
+
+try:    # optional: JIT-compile the scoring kernel (pays off for search use;
+        # the one-time compilation cost is amortized by cache=True)
+    from numba import njit
+    _score_groups = njit(cache=True)(_score_groups)
+    _HAVE_NUMBA = True
+except ImportError:
+    _HAVE_NUMBA = False
+
+@dataclass(slots=True)
+class Move:
+    """A move: the 2-tuple (square1, square2) with the two squares (e.g.,
+    "a1","b2") on which the quantum piece is to be placed on the board,
+    plus bookkeeping filled in by Board._push_move():
+    piece (str): name of the piece placed by this move (as shown in messages)
+    pending (bool): move requires a decision to be made by the next player
             (if square1 & square2 are already "entangled" prior to the move)
+    'squares' may also be given as a string starting with square1 and ending
+    with square2 (e.g., "a1,b2" - anything may separate the two); a 'board'
+    may be passed to check the coordinates against its size.
     """
-    def __repr__(self): # return f"Move({super().__repr__()})"
-        return f"Move('{','.join(self['squares'])}'"+(
-            ", pending=True"if self.get('pending')else'')+(
-            ", board=<Board at 0x{id(self['board']):x}>"
-            if'board'in self else'')+")"
-    def __init__(self, *args, **kwargs) -> 'Board':
-        """The args can be:
-    squares: (str | tuple[str] | None): either a 2-tuple (sq1,sq2) where
-            strings sq1, sq2 are coordinates of the squares (e.g.: "a1", "b2")
-            or a string starting with sq1 and ending with sq2. 
-    board: ('Board' | None) = None: the board on which the move is made.
-    Each of these args can also be given as kwargs, e.g.: squares=(sq1,sq2), or
-    as a dict with entries 'squares' and/or 'board'. Only 'squares' is required.
-        """
-        def check_duplicate(item):
-            """Check whether arg 'item' already given earlier/ elsewhere."""
-            if item in kwargs:
-                raise ValueError(f"Got argument '{arg}', but "# of type {type(arg)}
-                                 f"{item}={kwargs[item]} is already defined.")
-            kwargs[item] = arg
-            # return None
-            
-        for arg in args:
-            if isinstance(arg, (str,tuple,list)):
-                check_duplicate("squares")
-            elif isinstance(arg, Board):
-                check_duplicate("board")                
-            elif isinstance(arg, dict): # includes type(arg)==Move (which may
-                # contain 'board' in addition to 'squares'), but not type Board
-                any(map(check_duplicate, arg))
-            else:
-                raise ValueError("Unexpected argument {arg}")
-        self |= kwargs
-        
-        ### validity check of 'squares'
+    squares: tuple
+    piece: str = None
+    pending: bool = False
+    board: InitVar['Board'] = None
 
-        if 'squares' not in self:
-            raise ValueError("No squares given.")
-        
-        if isinstance(self['squares'], str):
-            # arg (expected of the form "a1,b2") will be split in 2 squares
-            move = self['squares'].strip() # remove whitespace
-            if len(move)<4:
+    def __repr__(self):
+        return f"Move('{','.join(self.squares)}'"+(
+            ", pending=True"if self.pending else'')+")"
+
+    def __post_init__(self, board):
+        ### validity check of 'squares'
+        if isinstance(self.squares, str):
+            # arg (expected of the form "a1,b2", where anything that is not a
+            # coordinate may separate the two squares) is split in one scan;
+            # multi-digit row specifications ("a10,b11") are handled too
+            m = _MOVE_RE.match(move := self.squares.strip())
+            if not m:
                 raise ValueError(f"Move must be of the form 'a1,a2', got '{move}'")
+            self.squares = (m.group(1).lower(), m.group(2).lower())
+
+        # by now, self.squares should be of type tuple or list
+        if len(self.squares) != 2:
+            raise ValueError(f"Expected exactly 2 squares, got {self.squares}")
 
-            # To allow for multi-digit row specification, we increase
-            # the length of the first or last substring to 3 when the
-            # 3rd (resp. 2nd-last) character is a digit
-            self['squares'] = (move[:2+move[2].isdigit()],
-                               move[-2-move[-2].isdigit():])
-            
-        # by now, self['squares'] should be of type tuple or list
-        if len(self['squares']) != 2:
-            raise ValueError(f"Expected exactly 2 squares, got {self['squares']}")
-
-        for s in self['squares']:
-            if not Square(s).is_valid_format:
+        for s in self.squares:
+            if not _SQUARE_RE.match(s):
                 raise ValueError(f"'{s}' is not a valid square specification.")
-        if s==self['squares'][0]:
-            raise ValueError(f"Squares must be different, got {self['squares']}")
+        if s==self.squares[0]:
+            raise ValueError(f"Squares must be different, got {self.squares}")
+        self.squares = tuple(self.squares)
 
         # if a board was given, check whether coordinates are legal
-        if board := self.get('board'):
-            if not all(map(board.is_valid_square, self['squares'])):
-                raise ValueError(f"Coordinates {self['squares']} out of range")
+        if board:
+            if not all(map(board.is_valid_square, self.squares)):
+                raise ValueError(f"Coordinates {self.squares} out of range")
                 #                f" must be in {{{board.cols}}} x {board.rows}")
             if board.debug > 3:
                 print(f"OK - {repr(self)} is initialized.")
@@ -96,9 +198,9 @@ class Square(str):
     "A square specification of the form 'a1' or 'z99'."
     @property
     def is_valid_format(s: str):
-        return 1<len(s)<4 and s[0].isalpha() and s[1:].isdigit() and int(s[1:])
+        return bool(_SQUARE_RE.match(s))
     
-class Board(dict):
+class Board:
     """A board for playing quantum Tic-tac-toe:
     The board is square, of size N x N with N = 3 by default.
     The squares can be empty or occupied with exactly one classical X or O
@@ -128,8 +230,8 @@ Attributes:
     size: (default: 3) size (# rows & columns) of the board. Can only be set at initialization.
     rows: (default: "123"): symbols of rows
     cols: (default: "abc"): symbols of columns
-    squares: list of squares = [c+r for c in cols for r in rows]
-    groups: generator of generators of the sequence of squares that form diagonals, rows & cols
+    squares: tuple of squares (c+r for c in cols for r in rows)
+    groups: tuple of tuples of the sequences of squares that form diagonals, rows & cols
     turn: symbol of the player who has to make the next move
     is_game_over: true if game is over
     score: > 0 or < 0 if the first or second player won, 0 if frawn, 'None' if game isn't over
@@ -141,13 +243,32 @@ Attributes:
     """
     symbols = 'XO' # symbols used by the (two(?)) players, and symbol for "no winner/drawn"
 
-    def __missing__(self, key):
-        if self.is_valid_square(key):
-            return set() # empty set for squares that don't have a piece yet
-        getattr(self,key) # mainly winner, score
-        
+    __slots__ = ('size', 'debug', 'moves', 'backups',
+                 '_pending', '_score', '_mpps', '_mpps_dirty', '_turn_idx',
+                 '_parent', '_rank', '_valid_squares', '_occ', '_owner',
+                 '_piece_player', '_piece_other', '_code_buf',
+                 '_score_fn', '_render_cache', 'cell_width')
+
+    def _pieces(self, square) -> set:
+        """Build the set of Piece objects on 'square' from the bitmask
+        occupancy.  Only used for rendering and the entanglement graph
+        query; the engine itself works on the integer data."""
+        sym = self._owner.get(square)
+        if sym is not None:
+            return {Piece(sym)}
+        pieces = set()
+        occ = self._occ[square]
+        while occ:
+            pid = (occ & -occ).bit_length() - 1 # lowest set bit
+            occ &= occ - 1
+            piece = Piece(self.piece_name(pid))
+            s1, s2 = self._piece_other[pid]
+            piece.other = s2 if square == s1 else s1
+            pieces.add(piece)
+        return pieces
+
     def __init__(self, *args, **kwargs):
-        "Initialize a quantum tic-tac-toe board. (kw)args include: size, other info/board to copy."
+        "Initialize a quantum tic-tac-toe board. (kw)args: size, debug."
         for arg in args:
             if isinstance(arg, int):
                 if 'size' in kwargs:
@@ -157,50 +278,61 @@ Attributes:
             elif isinstance(arg, dict): kwargs |= arg
             else:
                 raise ValueError(f"Don't know what to do with argument '{arg}'.")
+        self.size = kwargs.pop('size', 3)
+        self.debug = kwargs.pop('debug', False)
+        if kwargs:
+            raise ValueError(f"Don't know what to do with {kwargs}.")
         self.moves = []
         self.backups = []
-        self.used_pieces = set()
-        super().__init__(**kwargs)
-    @property
-    def debug(self): return self.get('debug', False)
-    @property
-    def size(self): return self.get('size', 3)
+        self._pending = ()
+        self._score = False # sentinel: not computed yet (score itself is
+                            # always None or an int, never False)
+        # Disjoint-set ("union-find") structure over the squares: two squares
+        # are in the same component iff they are (indirectly) entangled.
+        self._parent = {s: s for s in self.squares}
+        self._rank = {}
+        # Structure-of-arrays storage of the pieces: quantum piece number 'pid'
+        # (= index of the move that placed it) sits on the squares whose bit
+        # 'pid' is set in self._occ; its player & square pair are kept in the
+        # parallel arrays below.  A collapsed square holds a classical piece,
+        # recorded as its symbol in self._owner instead.
+        self._valid_squares = frozenset(self.squares)
+        self._occ = {s: 0 for s in self.squares}
+        self._piece_player = array('b')  # player index (0/1) per piece id
+        self._piece_other = []           # (square1, square2) per piece id
+        self._owner = {}         # square -> 'X'/'O' once collapsed
+        self._mpps = 0                   # max_pieces_per_square, maintained
+        self._mpps_dirty = False         # ... incrementally by push/decide/undo
+        self._turn_idx = 0               # index into symbols: whose turn it is
+        # small boards get a scorer with the winning lines unrolled
+        fn = _unrolled_scorer(self.size, self.symbols)
+        self._score_fn = (fn or Board.compute_score).__get__(self)
     @property
-    def pending(self): return self.get('pending', ())
+    def pending(self): return self._pending
     @property
     def cols(self):
         """Return string 'abc...' of letters allowed as column specifier."""
-        if not hasattr(self,'_cols'):
-            self._cols = str(bytes(range(97, 97+self.size)), encoding='ascii')
-        return self._cols
+        return _cols(self.size)
     @property
     def rows(self):
         """Tuple ('1','2','3',...) of valid row specifiers (may exceed '9'!)."""
-        if not hasattr(self,'_rows'):
-            self._rows = tuple(map(str, range(1, self.size+1)))
-            #self._rows = [str(i+1)for i in range(self.size)]
-        return self._rows
+        return _rows(self.size)
     @property
     def squares(self):
-        """Return list of all squares 'a1', 'a2', ..., 'c3' in order from
+        """Return tuple of all squares 'a1', 'a2', ..., 'c3' in order from
         top left to bottom right, i.e., a3, b3, c3; a2, b2, c2; a1, b1, c1
         (or similar for larger boards)."""
-        if not hasattr(self,'_squares'):
-            self._squares = [col+row for row in self.rows[::-1]
-                                     for col in self.cols]
-        return self._squares
+        return _squares(self.size)
     def is_valid_square(self, s: str):
         """Whether 's' is a valid square specifier, i.e., between 'a1' and 'z#',
-        where # = board size and 'z' is the corresponding letter."""
-        return s[1:] in self.rows and s[0] in self.cols
+        where # = board size and 'z' is the corresponding letter.
+        A single hash lookup in the precomputed set of squares."""
+        return s in self._valid_squares
     @property
     def groups(self):
-        "A sequence of generators of the diagonal & horizontal & vertical rows."
-        cols,rows = self.cols,self.rows
-        yield(c+r for c,r in zip(cols,rows))    # main diagonal
-        yield(c+r for c,r in zip(cols,rows[::-1])) # antidiagonal
-        for c in cols: yield(c+r for r in rows) # vertical files
-        for r in rows: yield(c+r for c in cols) # horizontal ranks
+        """Tuple of tuples of the squares forming the diagonals & horizontal
+        & vertical rows; computed once per size and reused."""
+        return _groups(self.size)
     @property
     def is_game_over(self):
         return self.score is not None # equivalent: isinstance(score, int)
@@ -211,58 +343,93 @@ Attributes:
     @property
     def score(self):
         """None if game not over, 0 if draw, > 0 or < 0 if 1st or 2nd player has won."""
-        if self.get('score', False) is False:
-            self['score'] = self.compute_score()
-        return self['score']
+        if self._score is False:
+            self._score = self._score_fn()
+        return self._score
 
     def compute_score(self):
         if self.pending: return # if there is a pending decision, there's no winner yet
-        winner = ''
-        for group in self.groups:
-            player = ''
-            for square in group:
-                if not self.is_classical(square): break
-                if not player: player = min(self[square])
-                elif player != min(self[square]): break
-            else: # reached the end of a group => found a winning group
-                # if we already have a winner, then their score grows
-                # if it's the same, or the game is drawn ("both won").
-                if winner and player != winner[0]:
-                    return 0        # "both win": draw
-                winner += player
-            # otherwise (i.e., a break occurred) proceed with next group
-        if winner:
-            return len(winner)if winner[0]==self.symbols[0] else-len(winner)
+        if not hasattr(self, '_code_buf'): # reusable square-code buffer
+            self._code_buf = array('b', bytes(self.size**2))
+        codes = self._code_buf ; size = self.size
+        gi = _group_index(size)
+        full = True # does every square hold a classical piece?
+        for i, s in enumerate(self.squares):
+            codes[i] = c = self._square_code(s)
+            if c != 1 and c != 2: full = False
+        if _HAVE_NUMBA:
+            w1, w2 = _score_groups(codes, gi, size)
+        else: # pure Python: packed-line table lookups beat the plain loop
+            table = _line_table(size)
+            w1 = w2 = 0
+            for g in range(0, len(gi), size):
+                idx = 0
+                for i in range(g, g+size): idx = idx<<2 | codes[gi[i]]
+                p = table[idx]
+                if p == 1: w1 += 1
+                elif p == 2: w2 += 1
+        if w1: return 0 if w2 else w1   # both players winning => draw
+        if w2: return -w2
         # no winner found => draw if the game is over (board full), else None
-        return 0 if all(self.is_classical(s) for s in self.squares) else None
+        return 0 if full else None
+
+    def owner_codes(self):
+        """The position's classical contents as a list of size**2 owner codes
+        (0 = none, 1 or 2 = classical piece of the 1st or 2nd player), in the
+        order of self.squares: one row of input for score_batch()."""
+        sym0 = self.symbols[0] ; get = self._owner.get
+        return [0 if (s := get(sq)) is None else 1 if s == sym0 else 2
+                for sq in self.squares]
+
+    def _square_code(self, square):
+        """2-bit encoding of a square's contents, as used by _line_table:
+        0 = empty, 1 or 2 = classical piece of 1st or 2nd player, 3 = quantum."""
+        sym = self._owner.get(square)
+        if sym is not None:
+            return 1 if sym == self.symbols[0] else 2
+        return 3 if self._occ[square] else 0
     @property
     def turn(self):
         "Return the player ('X' or 'O') whose turn it is."
-        return self.symbols[len(self.moves)&1]
+        return self.symbols[self._turn_idx]
     @property
     def row_height(self):
         """Number of text rows (& 'columns') needed to fit in all pieces in the
         fullest cell: ceil(sqrt(max_pieces_per_square)): 1=>1, 2..4=>2, 5..9=>3..."""
         return int(self.max_pieces_per_square**.5-1e-3)+1
-    MPPS='max_pieces_per_square'
     @property
     def max_pieces_per_square(self):
-        if self.debug>9:
-            print(f"{self.MPPS}: {self.get(self.MPPS,'undefined')}")
-        if type(self.get(self.MPPS, None))!=int:# WARNING: isinstance(False,int)=True!
-            self[self.MPPS] = max((len(self[square]) for square in self
-                                   if self.is_valid_square(square)), default=0)
+        """Largest number of pieces on any one square; push() raises it on the
+        fly, and events that can lower it (collapse, undo) just mark it dirty
+        so the full scan below only runs when actually needed."""
+        if self._mpps_dirty:
+            self._mpps = max(max((v.bit_count() # popcount, Python >= 3.10
+                                  for v in self._occ.values()), default=0),
+                             1 if self._owner else 0)
+            self._mpps_dirty = False
             if self.debug > 4:
-                print(f"{self.MPPS}: set to {self[self.MPPS]}")
-        return self[self.MPPS]
+                print(f"max_pieces_per_square: recomputed as {self._mpps}")
+        return self._mpps
     
+    def _render_templates(self):
+        """(row_height, row separator, row mask, column-header line) for the
+        current cell size; rebuilt only when max_pieces_per_square crosses a
+        square-number boundary, i.e., when row_height actually changes."""
+        nr = self.row_height
+        cache = getattr(self, '_render_cache', None)
+        if cache is None or cache[0] != nr:
+            # each piece uses 2 characters + inter-piece space ("X1 X2", ...)
+            self.cell_width = w = nr * 3 - 1
+            bar = '-' * w
+            separator = "\n" + bar . join('+' * (self.size+1)) + "\n"
+            mask = f'|{{:^{w}}}' * self.size + '| {}'
+            header = ''.join(" "+c.center(w) for c in self.cols)
+            cache = self._render_cache = (nr, separator, mask, header)
+        return cache
+
     def __str__(self) -> str:
         """Return str(self)."""
-        # each piece uses 2 characters + inter-piece space ("X1 X2", ...)
-        self.cell_width = self.row_height * 3 - 1 # subsequent functions use this
-        bar = '-' * self.cell_width
-        row_separator = "\n" + bar . join('+' * (self.size+1)) + "\n"
-        return row_separator . join(self . text_rows())
+        return self._render_templates()[1] . join(self . text_rows())
 
     def text_rows(self):
             """Generate the sequence of text rows for a 2D character display of self.
@@ -281,8 +448,8 @@ Attributes:
                 Player 'X' to play. "
             """
             yield f"Board after move {len(self.moves)}: (score: {self.score})"
-            cols = self.cols ; row_height = self.row_height
-            row_mask = f'|{{:^{self.cell_width}}}' * len(cols) + '| {}' 
+            cols = self.cols
+            row_height, _, row_mask, col_header = self._render_templates()
             for r in self.rows[::-1]:
                 # First, compute the contents for all cells of this row.
                 cells = [self.cell(c+r) for c in cols]
@@ -291,36 +458,61 @@ Attributes:
                                                 r if i==row_height//2 else'')
                                 for i in range(row_height))
             # now the last 2 rows: labels of columns, and status line (player to move...)
-            yield ''.join(" "+c.center(self.cell_width) for c in cols) + '\n' + self.status()
+            yield col_header + '\n' + self.status()
     def cell(self, square) -> list:
             """Return a list of 'row_height' strings which represent the pieces on square."""
             nr = self.row_height ; c = [''] * nr ; r = nr//2 # start in the middle
-            for piece in self[square]:
+            for piece in self._pieces(square):
                 c[r] += " " + piece if c[r] else piece
                 r = (r+1) % nr
             return c
     def status(self) -> str:
         """Return string describing the game status (drawn, decision awaited, who to play/has won/lost)."""
         return "The game is drawn." if self.score==0 else f"Player '{self.turn}' " + (
-                f"must decide about {self.moves[-1]['piece']}: {' or '.join(self.pending)} ?"
+                f"must decide about {self.moves[-1].piece}: {' or '.join(self.pending)} ?"
                 if self.pending else "to play." if self.score is None
                 else f"has {'won'if self.winner==self.turn else'lost'}.")
 
     def is_classical(self, square) -> bool:
         """True iff this square is occupied by a classical piece."""
-        return len(self[square])==1 and min(self[square]).is_classical
+        return square in self._owner
+
+    def _find(self, x):
+        """Return the representative of x's entanglement component.
+        Iterative with path halving, so amortized cost is near constant."""
+        parent = self._parent
+        while parent[x] != x:
+            x = parent[x] = parent[parent[x]]
+        return x
+    def _union(self, x, y):
+        """Merge the entanglement components of squares x and y (by rank)."""
+        x, y = self._find(x), self._find(y)
+        if x == y: return
+        rank = self._rank
+        if rank.get(x,0) < rank.get(y,0): x, y = y, x
+        self._parent[y] = x
+        if rank.get(x,0) == rank.get(y,0): rank[x] = rank.get(x,0) + 1
+    def _rebuild_dsu(self):
+        """Recompute the union-find structure from self.moves, after an undo
+        (unions can't be "removed" incrementally; N is tiny, so this is cheap)."""
+        self._parent = {s: s for s in self.squares}
+        self._rank = {}
+        for move in self.moves:
+            if not move.pending:
+                self._union(*move.squares)
 
     def entangled(self, src, dest):
-        """Are the two squares entangled?"""
-        queue = {src}; visited = set()
+        """Are the two squares entangled?  (Explicit graph query; push()
+        itself uses the equivalent union-find component test.)"""
+        queue = deque((src,)); visited = {src}
         while queue:
-            square = queue.pop()
-            assert square not in visited # shouldn't happen
-            visited |= {square}
-            for piece in self[square]:
-                if piece.other == dest: return True
-                if piece.other not in visited:
-                    queue |= {piece.other}
+            square = queue.popleft()
+            for piece in self._pieces(square):
+                other = piece.other
+                if other == dest: return True
+                if other not in visited:
+                    visited.add(other)
+                    queue.append(other)
 
     def push(self, move: (str,tuple,Move)):
         """Make a move (= place a quantum piece on two squares) or decision."""
@@ -330,86 +522,126 @@ Attributes:
 
         if isinstance(move, (str,tuple)): # probably always 'str'
             move = Move(move, board=self)
-        squares = move['squares']
-    
+        return self._push_move(move)
+
+    def push_fast(self, sq1, sq2):
+        """Fast path for engine-driven play (search, tests, move queues):
+        place a quantum piece on the two given squares without going through
+        Move() parsing; validation is a frozenset membership test."""
+        if sq1 not in self._valid_squares or sq2 not in self._valid_squares \
+                or sq1 == sq2:
+            raise ValueError(f"Invalid pair of squares ('{sq1}', '{sq2}').")
+        if self.pending:
+            raise ValueError(f"Decision pending: push one of {self.pending}.")
+        move = Move.__new__(Move) # skip the parsing/checks of Move.__init__
+        move.squares = (sq1, sq2) ; move.piece = None ; move.pending = False
+        return self._push_move(move)
+
+    def _push_move(self, move: 'Move'):
+        """Common part of push() / push_fast(): place the piece of 'move'."""
+        squares = move.squares
+
         if any(self.is_classical(s) for s in squares):
             raise ValueError("Both squares must be free of classical pieces.")
-        
+
         # if the 2 squares are entangled, the move leads to classical collapse:
-        if self.entangled(*squares):    # then next player decides how/where
-            self['pending'] = squares       # quantum pieces will collapse 
-            move['pending'] = True
-        elif 'pending' in move: # else no decision awaited
-            del move['pending']
-        
-        # now create the quantum piece(s) on the two squares
-        piece_name = self.get_piece_name()
-        for i in (0,1):
-            piece = Piece(piece_name); piece.other = squares[1-i]
-            self[squares[i]] |= {piece}
-        move['piece'] = piece ; self.moves.append(move)
-            
+        # (same component in the union-find structure <=> entangled)
+        if self._find(squares[0]) == self._find(squares[1]):
+            # then next player decides how/where
+            self._pending = squares         # quantum pieces will collapse
+            move.pending = True
+        else:                   # else no decision awaited
+            move.pending = False
+
+        # now create the quantum piece on the two squares: one new bit
+        pid = len(self._piece_player)   # == len(self.moves)
+        self._piece_player.append(pid & 1)
+        self._piece_other.append(squares)
+        self._occ[squares[0]] |= 1 << pid
+        self._occ[squares[1]] |= 1 << pid
+        move.piece = self.piece_name(pid) ; self.moves.append(move)
+        self._turn_idx ^= 1
+        if not move.pending: # the new piece extends a component
+            self._union(*squares)
+
         # check whether max_pieces_per_square must be updated
-        
-        M = max(len(self[s]) for s in squares)
-        if M > self['max_pieces_per_square']:
-            self['max_pieces_per_square'] = M
 
-        self.pop('score',0) # must recompute.
+        M = max(self._occ[s].bit_count() for s in squares)
+        if M > self._mpps:
+            self._mpps = M
+
+        self._score = False # must recompute.
         if self.debug > 2: print(f"OK - push({move}) done.")
 
+    def piece_name(self, pid):
+        """Display name of quantum piece number 'pid' (= index of the move
+        that placed it), e.g., 'X1', 'O1', 'X2', ...  Names are derived from
+        the integer id on demand; the engine itself never stores them."""
+        return self.symbols[pid&1] + str(pid//2+1)
+
     def get_piece_name(self):
         """Return next available name for a quantum piece. (Currently just
         'X'/'O'+(move number) - To do: better manage (un)used numbers."""
-        m = len(self.moves)
-        #self.used_pieces |= {piece_name}
-        return self.symbols[m&1] + str(m//2+1)
+        return self.piece_name(len(self.moves))
         
     def decide(self, choice):
         if choice not in self.pending:
             raise Exception("No decision awaited/possible.") if not self.pending\
                 else ValueError(f"Incorrect decision: must be one of {self.pending}.")
         self.backup_current_state() # for undo()
-        piece = self.moves[-1]['piece']
+        piece = self.moves[-1].piece
         print(f"Decision is: piece {piece} must go on square {choice}.")
-        self.make_classical(choice, piece)
-        del self['pending']
-        self.pop('score',0)
-        self.pop('max_pieces_per_square',0)
+        self.make_classical(choice, len(self.moves)-1) # pid of the last piece
+        self._pending = ()
+        self._score = False
+        self._mpps_dirty = True # the collapse may have lowered it
 
     def backup_current_state(self):
-        self.backups.append(self.copy())# could be more economical
+        """Open a new undo record for the upcoming collapse: make_classical
+        appends (square, previous occupancy) entries to self.backups[-1];
+        the head entry saves the scalars that decide() pops/overwrites.
+        Cost is O(squares touched) instead of copying the whole board."""
+        self.backups.append([(self._pending, self._score,
+                              self._mpps, self._mpps_dirty)])
     def restore_backup(self):
-        "Replace all content of self with backup pop()'d off self.backups."
+        "Undo the collapse recorded in the delta pop()'d off self.backups."
         if not self.backups:
             raise Exception("Error: no backup information available for undo()")
-        self.clear()
-        self |= self.backups.pop()
-        assert not self.pending
-        #if debug>2: print("***WARNING: after restore_backup, "
-        #        "position is not pending:\n", repr(self))
-
-    def make_classical(self, square, piece):
-        """Reduce 'piece' on 'square' to classical state and recursively "push"
-        the other pieces here to collapse on their respective 'other' square."""
-        
-        if piece not in self[square]:
-            # piece was queued for removal but has already been removed
-            if self.debug > 3:
-                print(f"mk: Piece '{piece}' no more on square '{square}'.")
-            return
-        self.used_pieces -= {piece}     # "free" this piece label
-        
-        # To make recursion more efficient and avoid loops, we remove all pieces
-        # on this square and keep their list separately, before going recursive.
-        pieces = self[square]
-        self[square] = {Piece(piece[0])} # first letter (i.e., X or O) only
-        for p in pieces:
-            # All of the pieces on this square should be quantum pieces,
-            # although the partner of some of them might already have disappeared
-            if p != piece:
-                #assert hasattr(p,'other') # always True: only quantum pieces here
-                self.make_classical(p.other, p) # implies the above assert
+        delta = self.backups.pop()
+        for square, occ in reversed(delta[1:]):
+            self._occ[square] = occ
+            self._owner.pop(square, None) # was quantum before collapse
+        (self._pending, self._score,    # the decision is awaited again
+         self._mpps, self._mpps_dirty) = delta[0]
+
+    def make_classical(self, square, pid):
+        """Reduce piece number 'pid' on 'square' to classical state and
+        "push" the other pieces here to collapse on their respective 'other'
+        square.  Iterative with an explicit worklist, so long collapse chains
+        on large boards can neither blow the recursion limit nor pay the
+        per-call frame overhead."""
+        stack = [(square, pid)]
+        while stack:
+            square, pid = stack.pop()
+            occ = self._occ[square]
+            if not occ >> pid & 1:
+                # piece was queued for removal but has already been removed
+                if self.debug > 3:
+                    print(f"mk: Piece #{pid} no more on square '{square}'.")
+                continue
+            self.backups[-1].append((square, occ)) # undo record for this square
+            # Clearing the whole square (which also removes the "ghost" copies
+            # of collapsed pieces) before queueing its partners avoids loops.
+            self._occ[square] = 0
+            self._owner[square] = self.symbols[self._piece_player[pid]]
+            occ &= ~(1 << pid)
+            while occ:
+                # All of the pieces on this square should be quantum pieces,
+                # although the partner of some might already have disappeared
+                p = (occ & -occ).bit_length() - 1
+                occ &= occ - 1
+                s1, s2 = self._piece_other[p]
+                stack.append((s2 if square == s1 else s1, p))
     
     def undo(self, number_of_moves: int = 1):
         """Undo the given number of moves or 'decisions'."""
@@ -419,15 +651,19 @@ Attributes:
 
             # Must we rather undo a decision? This is the case when the last
             # move did require one, but not the board, i.e., it's already made.
-            if self.moves[-1].get('pending') and not self.pending:
+            if self.moves[-1].pending and not self.pending:
                 self.restore_backup()
             else:
                 move = self.moves.pop()
-                for s in move['squares']:
-                    self[s] -= {move['piece']}
-                if 'pending' in move:
-                    del self['pending']
-                self.pop(self.MPPS,0)
+                pid = len(self._piece_player) - 1
+                self._piece_player.pop() ; self._piece_other.pop()
+                for s in move.squares:
+                    self._occ[s] &= ~(1 << pid)
+                if move.pending:
+                    self._pending = ()
+                self._turn_idx ^= 1
+                self._mpps_dirty = True # removal may have lowered it
+                self._rebuild_dsu()
 
             number_of_moves -= 1    # one less remaining to undo
         #end undo
@@ -477,7 +713,7 @@ then the game is drawn.""")
                     continue
             try:
                 if self.debug>5:
-                    print(f"try push({move}): mpps={self.get(self.MPPS,'undef')}")
+                    print(f"try push({move}): mpps={self._mpps}")
                 self.push(move)
                 if self.debug>4: print("OK - play({move}) done.")
             except ValueError as E: